@@ -0,0 +1,109 @@
+import json
+import math
+from flask import Response, request
+
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+JSON_MIME = 'application/json'
+
+
+def _finite(values):
+    # NaN/inf are not valid JSON, undefined statistics are sent as null.
+    return [value if math.isfinite(value) else None for value in values.tolist()]
+
+
+def _to_json(result):
+    forecast_dates = result["future_dates"]
+    return {
+        "params": result["params"],
+        "portfolio": {
+            "dates": [date.isoformat() for date in result["values"].index],
+            "values": _finite(result["values"]),
+        },
+        "forecast": {
+            "dates": [date.isoformat() for date in forecast_dates],
+            "expected": _finite(result["expected"]),
+            "variances": _finite(result["variances"]),
+            "bands": {
+                f'{confidence:.2f}': {"lower": _finite(lower), "upper": _finite(upper)}
+                for confidence, lower, upper in zip(result["confidence_levels"], result["lower"], result["upper"])
+            },
+        },
+    }
+
+
+def _to_arrow(result):
+    import pyarrow as pa
+
+    # One row per timestamp: history rows carry `value`, forecast rows carry the
+    # expected value, variance and band columns.
+    n_history, n_forecast = len(result["values"]), len(result["future_dates"])
+    history_nulls = pa.nulls(n_history, pa.float64())
+    forecast_nulls = pa.nulls(n_forecast, pa.float64())
+
+    def forecast_column(values):
+        return pa.concat_arrays([history_nulls, pa.array(values, pa.float64())])
+
+    dates = result["values"].index.append(result["future_dates"])
+    columns = {
+        "date": pa.array(dates),
+        "value": pa.concat_arrays([pa.array(result["values"].to_numpy(dtype=float)), forecast_nulls]),
+        "expected": forecast_column(result["expected"]),
+        "variance": forecast_column(result["variances"]),
+    }
+    for confidence, lower, upper in zip(result["confidence_levels"], result["lower"], result["upper"]):
+        columns[f'lower_{int(round(confidence * 100))}'] = forecast_column(lower)
+        columns[f'upper_{int(round(confidence * 100))}'] = forecast_column(upper)
+
+    table = pa.table(columns).replace_schema_metadata({"params": json.dumps(result["params"])})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _error(message, status):
+    return Response(json.dumps({"error": message}), status=status, mimetype=JSON_MIME)
+
+
+def register_api(server, results, defaults, options, max_future_periods):
+    @server.route('/api/risk-report')
+    def risk_report():
+        params = dict(defaults)
+        params.update({key: value for key, value in request.args.items() if key in defaults})
+        for key, allowed in options.items():
+            if params[key] not in allowed:
+                return _error(f"Unknown {key} '{params[key]}', expected one of {list(allowed)}", 400)
+        try:
+            params["future_periods"] = int(params["future_periods"])
+        except ValueError:
+            return _error("future_periods must be an integer", 400)
+        if not 0 <= params["future_periods"] <= max_future_periods:
+            return _error(f"future_periods must be between 0 and {max_future_periods}", 400)
+
+        fmt = request.args.get('format')
+        if fmt is None:
+            fmt = 'arrow' if request.accept_mimetypes.best_match([JSON_MIME, ARROW_MIME]) == ARROW_MIME else 'json'
+        if fmt not in ('json', 'arrow'):
+            return _error(f"Unknown format '{fmt}', expected 'json' or 'arrow'", 400)
+
+        if request.args.get('refresh', '').lower() in ('1', 'true'):
+            results.portfolio.get_data(params["timeframe"], params["period"])
+        try:
+            result = results.get(params["timeframe"], params["period"], params["model"], params["future_periods"],
+                                 params["distribution"])
+        except ValueError as e:
+            return _error(str(e), 400)
+        if result is None:
+            return _error("No data available", 404)
+
+        etag = f'{result["etag"]}-{fmt}'
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        elif fmt == 'arrow':
+            response = Response(_to_arrow(result), mimetype=ARROW_MIME)
+        else:
+            response = Response(json.dumps(_to_json(result), allow_nan=False), mimetype=JSON_MIME)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept')
+        return response
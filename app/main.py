@@ -1,28 +1,53 @@
-import numpy as np
+import importlib
 from dash import Dash, dcc, html, Input, Output, callback, State
-import plotly.express as px
-from config import portfolio_config, model_config
+from config import portfolio_config, app_config, timeframes, periods, get_model_params
 from src.portfolio import Portfolio
-from src.models.model import Model
-from src.models.ma_model import MAModel
-from src.models.ewma_model import EWMAModel
-from src.models.arch_model import ARCHModel
-from src.models.garch_model import GARCHModel
+from src.bands import DISTRIBUTIONS
+from src.results import ResultCache
+from app.api import register_api
 import dash_bootstrap_components as dbc
-import scipy.stats as stats
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
-portfolio = Portfolio(portfolio_config)
-hist_model = Model(portfolio)
-ma_model = MAModel(portfolio,**model_config.get('ma_params'))
-ewma_model = EWMAModel(portfolio,**model_config.get('ewma_params'))
-arch_model = ARCHModel(portfolio,**model_config.get('arch_params'))
-garch_model = GARCHModel(portfolio,**model_config.get('garch_params'))
+portfolio = Portfolio(portfolio_config, snapshot_dir=app_config.get('snapshot_dir'))
+
+MAX_FUTURE_PERIODS = 1000
+
+# Model modules are imported and instantiated on first use, once per timeframe so
+# each gets its own calibrated parameters.
+MODELS = {
+    'Historic': ('src.models.model', 'Model', None),
+    'MA': ('src.models.ma_model', 'MAModel', 'ma_params'),
+    'EWMA': ('src.models.ewma_model', 'EWMAModel', 'ewma_params'),
+    'ARCH': ('src.models.arch_model', 'ARCHModel', 'arch_params'),
+    'GARH': ('src.models.garch_model', 'GARCHModel', 'garch_params'),
+}
+_models = {}
+
+
+def get_model(name, timeframe):
+    if name not in MODELS:
+        name = 'Historic'
+    if (name, timeframe) not in _models:
+        module, class_name, params_key = MODELS[name]
+        model_class = getattr(importlib.import_module(module), class_name)
+        _models[(name, timeframe)] = model_class(portfolio, **get_model_params(params_key, timeframe))
+    return _models[(name, timeframe)]
+
+
+results = ResultCache(portfolio, get_model)
+register_api(app.server, results,
+             defaults={'timeframe': '1d', 'period': '1y', 'model': 'Historic', 'future_periods': 40,
+                       'distribution': 'normal'},
+             options={'timeframe': timeframes, 'period': periods, 'model': list(MODELS),
+                      'distribution': DISTRIBUTIONS},
+             max_future_periods=MAX_FUTURE_PERIODS)
 
 
 app.layout = html.Div([
     dcc.Store(id='theme-store', data={'mode': 'light'}),
+    dcc.Interval(id='initial-load', interval=1, n_intervals=0,
+                 max_intervals=1 if app_config.get('deferred_first_load') else 0),
 
     html.Link(
         rel='stylesheet',
@@ -49,23 +74,32 @@ app.layout = html.Div([
 
                 html.Div([
                     html.Label("Timeframe", className="input-label"),
-                    dcc.Dropdown(['1h', '1d'], '1d', id='timeframe-dropdown', className="dashboard-dropdown"),
+                    dcc.Dropdown(timeframes, '1d', id='timeframe-dropdown', className="dashboard-dropdown"),
                 ], className="input-container"),
 
                 html.Div([
                     html.Label("Period", className="input-label"),
-                    dcc.Dropdown(['1d', '5d', '1mo', '3mo','1y'], '1y', id='period-dropdown',
+                    dcc.Dropdown(periods, '1y', id='period-dropdown',
                                  className="dashboard-dropdown"),
                 ], className="input-container"),
 
                 html.Div([
                     html.Label("Variance Model", className="input-label"),
-                    dcc.Dropdown(['Historic','MA','EWMA','ARCH','GARH'], 'Historic', id='model-dropdown', className="dashboard-dropdown"),
+                    dcc.Dropdown(list(MODELS), 'Historic', id='model-dropdown', className="dashboard-dropdown"),
+                ], className="input-container"),
+
+                html.Div([
+                    html.Label("Band Distribution", className="input-label"),
+                    dcc.Dropdown([{'label': 'Normal', 'value': 'normal'},
+                                  {'label': 'Student-t', 'value': 'student-t'},
+                                  {'label': 'Cornish-Fisher', 'value': 'cornish-fisher'},
+                                  {'label': 'Filtered Historical Simulation', 'value': 'fhs'}],
+                                 'normal', id='distribution-dropdown', className="dashboard-dropdown"),
                 ], className="input-container"),
 
                 html.Div([
                     html.Label("Future Periods", className="input-label"),
-                    dcc.Input(id='future-periods-input', type='number', value=40, min=0, step=1,
+                    dcc.Input(id='future-periods-input', type='number', value=40, min=0, max=MAX_FUTURE_PERIODS, step=1,
                               className="dashboard-input"),
                 ], className="input-container"),
 
@@ -118,28 +152,27 @@ def update_theme(data):
 @callback(
     Output('graph', 'figure'),
     [Input('apply-btn', 'n_clicks'),
+     Input('initial-load', 'n_intervals'),
      Input('theme-store', 'data')],
     [State('timeframe-dropdown', 'value'),
      State('period-dropdown', 'value'),
      State('model-dropdown', 'value'),
+     State('distribution-dropdown', 'value'),
      State('future-periods-input', 'value')]
 )
-def update_data(n_clicks, theme_data, timeframe, period, model, future_periods):
-    df = portfolio.get_data(timeframe, period)
-
-    match model:
-        case 'Historic':
-            current_model = hist_model
-        case 'MA':
-            current_model = ma_model
-        case 'EWMA':
-            current_model = ewma_model
-        case 'ARCH':
-            current_model = arch_model
-        case 'GARH':
-            current_model = garch_model
-        case _:
-            current_model = hist_model
+def update_data(n_clicks, n_intervals, theme_data, timeframe, period, model, distribution, future_periods):
+    import plotly.express as px
+
+    future_periods = min(future_periods or 0, MAX_FUTURE_PERIODS)
+
+    if app_config.get('deferred_first_load') and not n_clicks and not n_intervals:
+        # First paint: show the last-known snapshot, the live download follows via 'initial-load'.
+        df = portfolio.load_snapshot(timeframe, period)
+        future_periods = 0
+        if df is None or df.empty:
+            return px.line(title="Loading data...")
+    else:
+        df = portfolio.get_data(timeframe, period)
 
     if df is None or df.empty:
         return px.line(title="No data available")
@@ -161,26 +194,19 @@ def update_data(n_clicks, theme_data, timeframe, period, model, future_periods):
 
     if future_periods > 0:
         import plotly.graph_objects as go
-        from datetime import timedelta
-
-        sigmas = current_model.get_variances(timeframe, period, future_periods)
 
-        mu = np.log(df / df.shift(1)).mean()
+        try:
+            result = results.get(timeframe, period, model, future_periods, distribution)
+        except ValueError as e:
+            return px.line(title=str(e))
 
-        s_0 = df.iloc[-1]
+        s_0 = result["values"].iloc[-1]
 
         last_date = plot_df["Date"].iloc[-1]
 
-        if timeframe == '1h':
-            time_delta = timedelta(hours=1)
-        else:
-            time_delta = timedelta(days=1)
-
-        future_dates = [last_date] + [last_date + (i + 1) * time_delta for i in range(future_periods)]
-
-        expected_values = [s_0] + [s_0 * (1 + mu * dt) for dt in range(1, future_periods + 1)]
+        future_dates = [last_date] + list(result["future_dates"])
 
-        confidence_levels = [0.99, 0.95, 0.90, 0.80, 0.50]
+        expected_values = [s_0] + list(result["expected"])
 
         base_color = 'rgba(98, 54, 255, {})'
         opacities = [0.1, 0.15, 0.2, 0.25, 0.3]
@@ -196,23 +222,9 @@ def update_data(n_clicks, theme_data, timeframe, period, model, future_periods):
             )
         )
 
-        for i, confidence in enumerate(confidence_levels):
-            z_score = stats.norm.ppf(1 - (1 - confidence) / 2)
-
-            upper_bounds = []
-            lower_bounds = []
-
-            upper_bounds.append(s_0)
-            lower_bounds.append(s_0)
-
-            for dt, (sigma, expected_value) in enumerate(zip(sigmas, expected_values[1:]), 1):
-                std_dev = s_0 * sigma ** (1 / 2) * dt ** (1 / 2)
-
-                upper = expected_value + z_score * std_dev
-                lower = expected_value - z_score * std_dev
-
-                upper_bounds.append(upper)
-                lower_bounds.append(lower)
+        for i, confidence in enumerate(result["confidence_levels"]):
+            upper_bounds = [s_0] + list(result["upper"][i])
+            lower_bounds = [s_0] + list(result["lower"][i])
 
             x_values = future_dates + future_dates[::-1]
 
@@ -225,7 +237,7 @@ def update_data(n_clicks, theme_data, timeframe, period, model, future_periods):
                     fill='toself',
                     fillcolor=base_color.format(opacities[i]),
                     line=dict(color='rgba(0,0,0,0)'),
-                    name=f'{int(confidence * 100)}% Confidence',
+                    name=f'{int(round(confidence * 100))}% Confidence',
                     hoverinfo='skip'
                 )
             )
@@ -277,12 +289,13 @@ def update_data(n_clicks, theme_data, timeframe, period, model, future_periods):
     [Output('timeframe-dropdown', 'value'),
      Output('period-dropdown', 'value'),
      Output('model-dropdown', 'value'),
+     Output('distribution-dropdown', 'value'),
      Output('future-periods-input', 'value')],
     Input('reset-btn', 'n_clicks'),
     prevent_initial_call=True
 )
 def reset_inputs(n_clicks):
-    return '1h', '1d', 'naive', 5
+    return '1h', '1d', 'naive', 'normal', 5
 
 
 app.index_string = '''
@@ -0,0 +1,59 @@
+import statistics
+import subprocess
+import sys
+import os
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each sample runs in a fresh interpreter so module caches don't hide import cost.
+IMPORT_SCRIPT = '''
+import time
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start)
+'''
+
+FIRST_FIGURE_SCRIPT = '''
+import time
+start = time.perf_counter()
+import app.main
+app.main.update_data(None, 0, {'mode': 'light'}, '1d', '1y', 'Historic', 'normal', 40)
+print(time.perf_counter() - start)
+'''
+
+
+def measure(script, repeat, snapshot_dir):
+    env = dict(os.environ, RISK_SNAPSHOT_DIR=snapshot_dir)
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True,
+                             check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def write_snapshot(snapshot_dir):
+    # A year of synthetic daily values for the dashboard's default timeframe and period.
+    import numpy as np
+    import pandas as pd
+    from config import portfolio_config
+    from src.portfolio import Portfolio
+
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=252, tz='America/New_York')
+    values = 1000 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(index))))
+    Portfolio(portfolio_config, snapshot_dir=snapshot_dir).save_snapshot(pd.Series(values, index=index), '1d', '1y')
+
+
+def report(name, samples):
+    print(f"{name:<34} median {statistics.median(samples) * 1000:8.1f} ms   "
+          f"min {min(samples) * 1000:8.1f} ms   max {max(samples) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as empty_dir, tempfile.TemporaryDirectory() as snapshot_dir:
+        write_snapshot(snapshot_dir)
+        report("import app.main", measure(IMPORT_SCRIPT, repeat, empty_dir))
+        report("time to first figure (snapshot)", measure(FIRST_FIGURE_SCRIPT, repeat, snapshot_dir))
+        report("time to first figure (no snapshot)", measure(FIRST_FIGURE_SCRIPT, repeat, empty_dir))
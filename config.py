@@ -1,3 +1,5 @@
+import json
+import os
 
 portfolio_config  = {
     'AAPL':4,
@@ -9,4 +11,32 @@ model_config = {
     "ewma_params": {"lambda": 0.89},
     "arch_params": {"p": 1},
     "garch_params": {"p": 1,"q":1},
-}
\ No newline at end of file
+}
+
+# Options offered by the dashboard and accepted by the risk report API.
+timeframes = ['1h', '1d']
+periods = ['1d', '5d', '1mo', '3mo', '1y']
+
+# Written by `python -m src.calibration` as {timeframe: {params_key: params}}; for a
+# timeframe it covers, these override the defaults in model_config.
+calibrated_params_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calibrated_params.json')
+calibrated_model_config = {}
+
+if os.path.exists(calibrated_params_path):
+    with open(calibrated_params_path) as f:
+        calibrated_model_config = json.load(f)
+
+
+def get_model_params(params_key, timeframe):
+    if params_key is None:
+        return {}
+    return {**model_config.get(params_key, {}), **calibrated_model_config.get(timeframe, {}).get(params_key, {})}
+
+app_config = {
+    # Render the last-known snapshot on first paint and download live data right after.
+    "deferred_first_load": True,
+    # Point RISK_SNAPSHOT_DIR at shared storage, or a directory baked into the image,
+    # so freshly started replicas have a snapshot to show.
+    "snapshot_dir": os.environ.get('RISK_SNAPSHOT_DIR',
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), '.snapshots')),
+}
@@ -0,0 +1,137 @@
+import numpy as np
+from src.cache import BoundedCache
+from src.models.abstract_model import AbstractModel
+from src.portfolio import Portfolio
+
+DISTRIBUTIONS = ['normal', 'student-t', 'cornish-fisher', 'fhs']
+
+
+class BandEngine:
+    # Return quantiles of the forecast horizon for every band at once. Standardized
+    # residual pools and their fitted shape parameters are cached per model and dataset.
+    def __init__(self, portfolio: Portfolio, n_simulations=10000, seed=0, maxsize=64, max_block=1_000_000):
+        self.portfolio = portfolio
+        self.n_simulations = n_simulations
+        self.seed = seed
+        self.max_block = max_block
+        self._pools = BoundedCache(maxsize)
+
+    def get_pool(self, model: AbstractModel, timeframe: str, period: str):
+        histories = self.portfolio.get_histories(timeframe, period)
+        key = (model, timeframe, period)
+        cached = self._pools.get(key)
+        if cached is None or cached[0] is not histories:
+            log_returns = self.portfolio.get_returns(timeframe, period)
+            variances = model.get_conditional_variances(timeframe, period)
+            residuals = (log_returns - log_returns.mean()) / np.sqrt(variances)
+            pool = residuals.replace([np.inf, -np.inf], np.nan).dropna().to_numpy()
+            if len(pool) < 2:
+                raise ValueError("Not enough returns to build a residual pool")
+            cached = (histories, {"residuals": pool})
+            self._pools[key] = cached
+        return cached[1]
+
+    def _shape(self, pool, name):
+        # Fitted lazily so each distribution only pays for its own parameters.
+        import scipy.stats as stats
+
+        if name not in pool:
+            residuals = pool["residuals"]
+            if name == 't':
+                pool[name] = stats.t.fit(residuals)
+            elif name == 'moments':
+                pool[name] = (stats.skew(residuals), stats.kurtosis(residuals))
+        return pool[name]
+
+    def quantiles(self, distribution: str, model: AbstractModel, timeframe: str, period: str,
+                  variances, probabilities):
+        # Returns a (len(probabilities), horizon) matrix of cumulative log-return quantiles.
+        import scipy.stats as stats
+
+        variances = np.asarray(variances, dtype=float)
+        probabilities = np.asarray(probabilities, dtype=float)
+        # `variances` holds one variance per step; the horizon's variance is their sum.
+        cumulative = np.cumsum(variances)
+        horizon_std = np.sqrt(cumulative)
+        # Share of the horizon's 4th cumulant left after aggregation: 1 for one step,
+        # 1/h for h equal steps.
+        kurtosis_ratio = np.cumsum(variances ** 2) / cumulative ** 2
+
+        if distribution == 'normal':
+            q = stats.norm.ppf(probabilities)[:, None] * horizon_std[None, :]
+        elif distribution == 'student-t':
+            dof, loc, scale = self._shape(self.get_pool(model, timeframe, period), 't')
+            q = np.cumsum(loc * np.sqrt(variances))[None, :] + horizon_std[None, :] * student_t(
+                probabilities, dof, scale, kurtosis_ratio)
+        elif distribution == 'cornish-fisher':
+            skew, kurt = self._shape(self.get_pool(model, timeframe, period), 'moments')
+            skew_h = skew * np.cumsum(variances ** 1.5) / cumulative ** 1.5
+            q = cornish_fisher(probabilities, skew_h, kurt * kurtosis_ratio) * horizon_std[None, :]
+        elif distribution == 'fhs':
+            q = self._simulate(self.get_pool(model, timeframe, period)["residuals"], variances, probabilities)
+        else:
+            raise ValueError(f"Unknown distribution '{distribution}', expected one of {DISTRIBUTIONS}")
+
+        # Bands must nest: quantiles never decrease with probability.
+        order = np.argsort(probabilities)
+        q[order] = np.sort(q[order], axis=0)
+        return q
+
+    def _simulate(self, residuals, variances, probabilities):
+        # Bootstrapped paths are built a block of steps at a time, carrying the running
+        # total, so memory stays at `max_block` values whatever the horizon.
+        rng = np.random.default_rng(self.seed)
+        step_std = np.sqrt(variances)
+        block_steps = max(1, self.max_block // self.n_simulations)
+        q = np.empty((len(probabilities), len(variances)))
+        total = np.zeros((self.n_simulations, 1))
+        for start in range(0, len(variances), block_steps):
+            stop = min(start + block_steps, len(variances))
+            block = rng.choice(residuals, size=(self.n_simulations, stop - start))
+            block *= step_std[None, start:stop]
+            np.cumsum(block, axis=1, out=block)
+            block += total
+            total = block[:, -1:].copy()
+            q[:, start:stop] = np.quantile(block, probabilities, axis=0)
+        return q
+
+
+def student_t(probabilities, dof, scale, kurtosis_ratio):
+    # Standardized horizon quantiles of a sum of t-distributed steps. With a finite
+    # 4th moment (dof > 4) the sum is matched to a t with the aggregated kurtosis and
+    # the same variance; heavier tails keep the one-step shape, which is conservative.
+    import scipy.stats as stats
+
+    if dof > 4:
+        dof_h = 4 + (dof - 4) / kurtosis_ratio
+        scale_h = scale * np.sqrt(dof / (dof - 2) * (dof_h - 2) / dof_h)
+    else:
+        dof_h = np.full_like(kurtosis_ratio, dof)
+        scale_h = np.full_like(kurtosis_ratio, scale)
+    return scale_h[None, :] * stats.t.ppf(np.asarray(probabilities)[:, None], dof_h[None, :])
+
+
+def cornish_fisher(probabilities, skew, kurt):
+    # Standardized quantiles, (len(probabilities), len(skew)), for per-horizon skewness
+    # and excess kurtosis. Where the expansion would stop increasing over the
+    # requested probabilities, skew and kurtosis are shrunk towards 0 until it doesn't.
+    import scipy.stats as stats
+
+    n = stats.norm.ppf(np.asarray(probabilities, dtype=float))[:, None]
+    shrink = _cornish_fisher_shrink(n.min(), n.max(), np.atleast_1d(skew), np.atleast_1d(kurt))
+    s, k = skew * shrink, kurt * shrink
+    return n + (n ** 2 - 1) * s / 6 + (n ** 3 - 3 * n) * k / 24 - (2 * n ** 3 - 5 * n) * s ** 2 / 36
+
+
+def _cornish_fisher_shrink(lo, hi, skew, kurt, steps=101):
+    # dz/dn = a*n**2 + b*n + c; the largest factor t in [0, 1] keeping it positive on
+    # [lo, hi] for (t*skew, t*kurt). t = 0 gives the normal, which always qualifies.
+    t = np.linspace(1, 0, steps)[:, None]
+    s, k = t * skew[None, :], t * kurt[None, :]
+    a = k / 8 - s ** 2 / 6
+    b = s / 3
+    c = 1 - k / 8 + 5 * s ** 2 / 36
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vertex = np.clip(np.where(a > 0, -b / (2 * a), lo), lo, hi)
+    slope = np.minimum.reduce([a * n ** 2 + b * n + c for n in (lo, hi, vertex)])
+    return t[np.argmax(slope > 0, axis=0), 0]
@@ -0,0 +1,25 @@
+import threading
+from collections import OrderedDict
+
+
+class BoundedCache(OrderedDict):
+    # Least-recently-used dict that drops its oldest entries beyond `maxsize`.
+    # Dash callbacks and API requests run on concurrent threads, hence the lock.
+    def __init__(self, maxsize=128):
+        super().__init__()
+        self.maxsize = maxsize
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self:
+                return default
+            self.move_to_end(key)
+            return self[key]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            while len(self) > self.maxsize:
+                self.popitem(last=False)
@@ -0,0 +1,111 @@
+import json
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.portfolio import Portfolio
+
+DEFAULT_WINDOWS = np.arange(5, 505)
+DEFAULT_LAMBDAS = np.linspace(0.80, 0.995, 500)
+
+
+def _loss(forecasts, realized, loss):
+    # forecasts: (n_candidates, T), realized: (T,)
+    forecasts = np.maximum(forecasts, 1e-20)
+    if loss == 'qlike':
+        return np.mean(np.log(forecasts) + realized / forecasts, axis=1)
+    if loss == 'mse':
+        return np.mean((forecasts - realized) ** 2, axis=1)
+    raise ValueError(f"Unknown loss '{loss}', expected 'qlike' or 'mse'")
+
+
+def ma_forecasts(squared_returns, windows, start):
+    # One cumulative sum serves every window: the forecast for t is the mean of
+    # the `w` squared returns before t, i.e. (c[t] - c[t - w]) / w.
+    windows = np.asarray(windows, dtype=int)
+    c = np.concatenate(([0.0], np.cumsum(squared_returns)))
+    t = np.arange(start, len(squared_returns))
+    return (c[t][None, :] - c[t[None, :] - windows[:, None]]) / windows[:, None]
+
+
+def ewma_weights(lambdas, n_lags):
+    # Row i holds the decay weights (1 - l) * l**k of lambdas[i] for the last `n_lags` squared returns.
+    lambdas = np.asarray(lambdas, dtype=float)
+    return (1 - lambdas[:, None]) * lambdas[:, None] ** np.arange(n_lags)[None, :]
+
+
+def ewma_forecasts(squared_returns, lambdas, start, n_lags, seed):
+    # Same recursion as EWMAModel, started `n_lags` bars back from the sample variance
+    # `seed`, which keeps the weight l**n_lags the truncated lags leave behind.
+    # Lag matrix of shape (T, n_lags) with the most recent observation first, so
+    # every lambda's forecast path comes from a single matrix product.
+    lambdas = np.asarray(lambdas, dtype=float)
+    lags = sliding_window_view(squared_returns[:-1], n_lags)[start - n_lags:, ::-1]
+    return ewma_weights(lambdas, n_lags) @ lags.T + (lambdas ** n_lags)[:, None] * seed
+
+
+def sweep(log_returns, windows=DEFAULT_WINDOWS, lambdas=DEFAULT_LAMBDAS, loss='qlike', tol=1e-6):
+    r = np.asarray(log_returns, dtype=float)
+    r = r[np.isfinite(r)]
+    squared = np.square(r)
+
+    # A window longer than half the sample leaves too little to evaluate and, once
+    # applied to the same period in the dashboard, degenerates into the Historic model.
+    windows = np.asarray(windows, dtype=int)
+    windows = windows[windows <= len(squared) // 2]
+    if len(windows) == 0:
+        raise ValueError(f"Not enough returns ({len(squared)}) for any candidate window")
+    lambdas = np.asarray(lambdas, dtype=float)
+    # Keep enough lags for the slowest decay to fall below `tol`. On short series the
+    # cap leaves a larger share on the seed, so the grid should stay well below 1.
+    n_lags = int(np.ceil(np.log(tol) / np.log(lambdas.max())))
+    n_lags = max(1, min(n_lags, len(squared) // 2))
+    start = max(int(windows.max()), n_lags)
+    if start >= len(squared):
+        raise ValueError(f"Not enough returns ({len(squared)}) for a sweep starting at {start}")
+
+    realized = squared[start:]
+    ma_scores = _loss(ma_forecasts(squared, windows, start), realized, loss)
+    # Seeded from returns before the evaluation sample only, so the forecasts don't see it.
+    seed = r[:start].var(ddof=1)
+    ewma_scores = _loss(ewma_forecasts(squared, lambdas, start, n_lags, seed), realized, loss)
+
+    return {
+        "ma": {"windows": windows, "scores": ma_scores},
+        "ewma": {"lambdas": lambdas, "scores": ewma_scores},
+        "best": {
+            "ma_params": {"window": int(windows[np.argmin(ma_scores)])},
+            "ewma_params": {"lambda": float(lambdas[np.argmin(ewma_scores)])},
+        },
+    }
+
+
+def write_params(params, path):
+    with open(path, 'w') as f:
+        json.dump(params, f, indent=4)
+
+
+def calibrate(portfolio: Portfolio, timeframes, period: str, path=None, **kwargs):
+    # One sweep per timeframe; the written file maps each timeframe to its best parameters.
+    results = {}
+    for timeframe in timeframes:
+        log_returns = portfolio.get_returns(timeframe, period)
+        results[timeframe] = sweep(log_returns.values, **kwargs)
+    if path is not None:
+        write_params({timeframe: result["best"] for timeframe, result in results.items()}, path)
+    return results
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from config import portfolio_config, calibrated_params_path, timeframes, periods
+
+    # Calibrate on the longest period the dashboard offers, so the windows fit every period up to it.
+    period = sys.argv[1] if len(sys.argv) > 1 else periods[-1]
+
+    start_time = time.perf_counter()
+    results = calibrate(Portfolio(portfolio_config), timeframes, period, path=calibrated_params_path)
+    elapsed = time.perf_counter() - start_time
+    for timeframe, result in results.items():
+        n_candidates = len(result["ma"]["windows"]) + len(result["ewma"]["lambdas"])
+        print(f"{timeframe}: evaluated {n_candidates} candidates, best {result['best']}")
+    print(f"Calibrated {len(results)} timeframes in {elapsed:.2f}s")
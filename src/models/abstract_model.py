@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import pandas as pd
 from src.portfolio import Portfolio
 
 
@@ -9,4 +10,9 @@ class AbstractModel(ABC):
 
     @abstractmethod
     def get_variances(self, timeframe:str, period:str, future_periods:int)->list[float]:
-        pass
\ No newline at end of file
+        pass
+
+    def get_conditional_variances(self, timeframe:str, period:str)->pd.Series:
+        # In-sample variance known before each return, used to standardize residuals.
+        log_returns = self.portfolio.get_returns(timeframe, period)
+        return pd.Series(log_returns.var(), index=log_returns.index)
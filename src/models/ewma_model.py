@@ -1,22 +1,23 @@
 from src.models.abstract_model import AbstractModel
 from src.portfolio import Portfolio
 import numpy as np
+import pandas as pd
 
 class EWMAModel(AbstractModel):
     def __init__(self,portfolio:Portfolio,**kwargs):
         self.portfolio = portfolio
         self.l=kwargs['lambda']
 
-    def get_variances(self, timeframe: str, period: str, future_periods:int)->list[float]:
-        df = self.portfolio.get_data(timeframe, period)
-        log_returns = np.log(df / df.shift(1))
-
-        r_squared= log_returns.iloc[-1:]**2
-        sigma_squared = log_returns.var()
-
-        ewma = (1-self.l) * r_squared + self.l * sigma_squared
-        ewma=ewma.values[0]
-        return [ewma]*future_periods
-
+    def _recursion(self, timeframe: str, period: str):
+        # sigma2[t+1] = l * sigma2[t] + (1 - l) * r[t]**2, seeded with the sample variance.
+        log_returns = self.portfolio.get_returns(timeframe, period)
+        seeded = pd.Series(np.concatenate(([log_returns.var()], np.square(log_returns.to_numpy()))))
+        return log_returns, seeded.ewm(alpha=1-self.l, adjust=False).mean().to_numpy()
 
+    def get_variances(self, timeframe: str, period: str, future_periods:int)->list[float]:
+        _, sigma_squared = self._recursion(timeframe, period)
+        return [sigma_squared[-1]]*future_periods
 
+    def get_conditional_variances(self, timeframe: str, period: str):
+        log_returns, sigma_squared = self._recursion(timeframe, period)
+        return pd.Series(sigma_squared[:-1], index=log_returns.index)
@@ -9,9 +9,12 @@ class MAModel(AbstractModel):
         self.window= kwargs['window']
 
     def get_variances(self, timeframe: str, period: str, future_periods:int)->list[float]:
-        df = self.portfolio.get_data(timeframe, period)
-        log_returns = np.log(df / df.shift(1))
+        log_returns = self.portfolio.get_returns(timeframe, period)
         squared_returns = np.square(log_returns.iloc[-self.window:])
         variance = squared_returns.mean()
         return [variance]*future_periods
 
+    def get_conditional_variances(self, timeframe: str, period: str):
+        log_returns = self.portfolio.get_returns(timeframe, period)
+        return np.square(log_returns).rolling(self.window).mean().shift(1)
+
@@ -7,6 +7,6 @@ class Model(AbstractModel):
         self.portfolio = portfolio
 
     def get_variances(self, timeframe: str, period: str, future_periods:int)->list[float]:
-        variance = self.portfolio.get_data(timeframe, period).pct_change().var()
+        variance = self.portfolio.get_returns(timeframe, period).var()
         return [variance]*future_periods
 
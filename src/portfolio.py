@@ -1,30 +1,125 @@
-import yfinance as yf
+import hashlib
+import os
 import pandas as pd
+from src import returns
+from src.cache import BoundedCache
 
 class Portfolio:
-    def __init__(self, config):
+    def __init__(self, config, snapshot_dir=None, cache_size=32):
         self.config = config  # Diccionario con {ticker: número de acciones}
+        self.snapshot_dir = snapshot_dir
+        self._datasets = BoundedCache(cache_size)
+        self._value_cache = BoundedCache(cache_size)
+        self._returns_cache = BoundedCache(cache_size)
+        self._future_dates_cache = BoundedCache(cache_size)
+        self._snapshot_digests = BoundedCache(cache_size)
 
     @staticmethod
-    def get_prices(ticker, timeframe, period):
-        return yf.Ticker(ticker).history(period=period, interval=timeframe)['Close']
+    def get_history(ticker, timeframe, period):
+        import yfinance as yf
+        # Dividends are left out of Close and folded into returns by src.returns.
+        return yf.Ticker(ticker).history(period=period, interval=timeframe, auto_adjust=False, actions=True)
 
     def get_data(self, timeframe, period):
-        hists = []
-        for ticker, n_stocks in self.config.items():
-            hists.append(self.get_prices(ticker, timeframe, period) * n_stocks)
+        return self.get_value(timeframe, period, self._refresh(timeframe, period))
 
-        if hists:
-            total_portfolio = pd.concat(hists, axis=1).sum(axis=1)
-            return total_portfolio
-        return None
+    def _refresh(self, timeframe, period):
+        histories = {}
+        for ticker in self.config:
+            histories[ticker] = self.get_history(ticker, timeframe, period)
+        self._datasets[(timeframe, period)] = histories
 
+        total_portfolio = self.get_value(timeframe, period, histories)
+        if total_portfolio is not None:
+            self.save_snapshot(total_portfolio, timeframe, period)
+        return histories
 
-if __name__ == '__main__':
-    from config import portfolio_config
-    print(Portfolio(portfolio_config).get_data(timeframe='1h',period='5d'))
+    def get_histories(self, timeframe, period):
+        # Reuse the last download for this timeframe/period so every model and the
+        # plot work off the same dataset. Read once: another thread may evict it.
+        histories = self._datasets.get((timeframe, period))
+        if histories is None:
+            histories = self._refresh(timeframe, period)
+        return histories
+
+    def get_value(self, timeframe, period, histories=None):
+        if histories is None:
+            histories = self.get_histories(timeframe, period)
+        cached = self._value_cache.get((timeframe, period))
+        if cached is None or cached[0] is not histories:
+            cached = (histories, returns.portfolio_value(histories, self.config))
+            self._value_cache[(timeframe, period)] = cached
+        return cached[1]
+
+    def get_returns(self, timeframe, period, gaps='drop'):
+        # Intraday bars only by default; the overnight gaps are modelled separately
+        # through get_gap_moments.
+        histories = self.get_histories(timeframe, period)
+        key = (timeframe, period, gaps)
+        cached = self._returns_cache.get(key)
+        if cached is None or cached[0] is not histories:
+            cached = (histories, returns.log_returns(histories, self.config, timeframe, gaps=gaps))
+            self._returns_cache[key] = cached
+        return cached[1]
+
+    def get_gap_moments(self, timeframe, period):
+        # Mean and variance of the overnight/weekend gap returns, zero when the
+        # timeframe has none (daily bars) or the data holds no session boundary.
+        if returns.bar_step(timeframe) is None:
+            return 0.0, 0.0
+        gap_returns = self.get_returns(timeframe, period, gaps='only')
+        if len(gap_returns) < 2:
+            return 0.0, 0.0
+        return gap_returns.mean(), gap_returns.var()
 
+    def get_future_dates(self, timeframe, period, future_periods):
+        histories = self.get_histories(timeframe, period)
+        key = (timeframe, period)
+        cached = self._future_dates_cache.get(key)
+        if cached is None or cached[0] is not histories or len(cached[1]) < future_periods:
+            last_date = self.get_value(timeframe, period).index[-1]
+            dates = returns.future_dates(last_date, timeframe, future_periods,
+                                         returns.primary_exchange(self.config))
+            cached = (histories, dates)
+            self._future_dates_cache[key] = cached
+        return cached[1][:future_periods]
 
+    def _snapshot_path(self, timeframe, period):
+        name = '_'.join(f'{ticker}-{n_stocks}' for ticker, n_stocks in sorted(self.config.items()))
+        return os.path.join(self.snapshot_dir, f'{name}_{timeframe}_{period}.parquet')
 
+    @staticmethod
+    def _snapshot_digest(data):
+        digest = hashlib.sha256(data.index.asi8.tobytes())
+        digest.update(data.to_numpy(dtype=float).tobytes())
+        return digest.hexdigest()
+
+    def save_snapshot(self, data, timeframe, period):
+        if self.snapshot_dir is None or data.empty:
+            return
+        path = self._snapshot_path(timeframe, period)
+        digest = self._snapshot_digest(data)
+        if self._snapshot_digests.get(path) == digest:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        # Write then rename so replicas sharing the directory never read a partial file.
+        # Parquet rather than pickle: the directory may be shared, and unpickling runs code.
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        data.rename('value').to_frame().to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        self._snapshot_digests[path] = digest
+
+    def load_snapshot(self, timeframe, period):
+        if self.snapshot_dir is None:
+            return None
+        path = self._snapshot_path(timeframe, period)
+        if not os.path.exists(path):
+            return None
+        data = pd.read_parquet(path)['value'].rename(None)
+        self._snapshot_digests[path] = self._snapshot_digest(data)
+        return data
 
 
+if __name__ == '__main__':
+    from config import portfolio_config
+    print(Portfolio(portfolio_config).get_data(timeframe='1h',period='5d'))
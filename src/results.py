@@ -0,0 +1,103 @@
+import hashlib
+import threading
+import numpy as np
+from src import returns
+from src.bands import BandEngine
+from src.cache import BoundedCache
+from src.portfolio import Portfolio
+
+CONFIDENCE_LEVELS = [0.99, 0.95, 0.90, 0.80, 0.50]
+
+
+def compute_results(portfolio: Portfolio, model, timeframe: str, period: str, future_periods: int,
+                    bands: BandEngine, distribution: str = 'normal', model_name: str = None):
+    values = portfolio.get_value(timeframe, period)
+    if values is None or values.empty:
+        return None
+
+    result = {
+        "params": {"timeframe": timeframe, "period": period, "model": model_name or type(model).__name__,
+                   "future_periods": future_periods, "distribution": distribution},
+        "values": values,
+        "future_dates": values.index[:0],
+        "expected": np.empty(0),
+        "variances": np.empty(0),
+        "confidence_levels": np.asarray(CONFIDENCE_LEVELS),
+        "lower": np.empty((len(CONFIDENCE_LEVELS), 0)),
+        "upper": np.empty((len(CONFIDENCE_LEVELS), 0)),
+    }
+
+    if future_periods > 0:
+        variances = model.get_variances(timeframe, period, future_periods)
+        if variances is None:
+            raise ValueError(f"{type(model).__name__} does not produce variance forecasts")
+        variances = np.asarray(variances, dtype=float)
+
+        # Models see intraday returns only; steps that open a new session add the
+        # mean and variance of the overnight gap on top.
+        future_dates = portfolio.get_future_dates(timeframe, period, future_periods)
+        crossings = returns.session_crossings(values.index[-1], future_dates,
+                                              returns.primary_exchange(portfolio.config))
+        gap_mu, gap_var = portfolio.get_gap_moments(timeframe, period)
+        variances = variances + gap_var * crossings
+
+        mu = portfolio.get_returns(timeframe, period).mean()
+        s_0 = values.iloc[-1]
+
+        expected = s_0 * (1 + np.cumsum(mu + gap_mu * crossings))
+        tails = (1 - result["confidence_levels"]) / 2
+        quantiles = bands.quantiles(distribution, model, timeframe, period, variances,
+                                    np.concatenate([tails, 1 - tails]))
+        n_levels = len(tails)
+
+        result.update({
+            "future_dates": future_dates,
+            "expected": expected,
+            "variances": variances,
+            "lower": expected[None, :] + s_0 * quantiles[:n_levels],
+            "upper": expected[None, :] + s_0 * quantiles[n_levels:],
+        })
+
+    result["etag"] = _fingerprint(result)
+    return result
+
+
+def _fingerprint(result):
+    digest = hashlib.sha256(repr(sorted(result["params"].items())).encode())
+    digest.update(result["values"].index.asi8.tobytes())
+    digest.update(result["values"].to_numpy(dtype=float).tobytes())
+    digest.update(result["future_dates"].asi8.tobytes())
+    for key in ("expected", "variances", "confidence_levels", "lower", "upper"):
+        digest.update(np.ascontiguousarray(result[key], dtype=float).tobytes())
+    return digest.hexdigest()[:32]
+
+
+class ResultCache:
+    # Forecast results per (timeframe, period, model, future_periods), shared by the
+    # dashboard and the report API and recomputed only when a new dataset is downloaded.
+    def __init__(self, portfolio: Portfolio, get_model, bands: BandEngine = None, maxsize=256):
+        self.portfolio = portfolio
+        self.get_model = get_model
+        self.bands = bands if bands is not None else BandEngine(portfolio)
+        self._cache = BoundedCache(maxsize)
+        self._lock = threading.Lock()
+        self._key_locks = BoundedCache(maxsize)
+
+    def get(self, timeframe: str, period: str, model: str, future_periods: int, distribution: str = 'normal'):
+        histories = self.portfolio.get_histories(timeframe, period)
+        key = (timeframe, period, model, future_periods, distribution)
+        # One lock per key, so concurrent identical misses compute once while
+        # different requests still run in parallel.
+        with self._lock:
+            key_lock = self._key_locks.get(key)
+            if key_lock is None:
+                key_lock = threading.Lock()
+                self._key_locks[key] = key_lock
+        with key_lock:
+            cached = self._cache.get(key)
+            if cached is None or cached[0] is not histories:
+                result = compute_results(self.portfolio, self.get_model(model, timeframe), timeframe, period,
+                                         future_periods, self.bands, distribution, model_name=model)
+                cached = (histories, result)
+                self._cache[key] = cached
+        return cached[1]
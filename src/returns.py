@@ -0,0 +1,192 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Regular sessions and full-day closures for the exchanges we trade on.
+EXCHANGE_CALENDARS = {
+    'XNYS': {
+        'tz': 'America/New_York',
+        'open': '09:30',
+        'close': '16:00',
+        'weekmask': 'Mon Tue Wed Thu Fri',
+        'holidays': [
+            '2024-01-01', '2024-01-15', '2024-02-19', '2024-03-29', '2024-05-27', '2024-06-19',
+            '2024-07-04', '2024-09-02', '2024-11-28', '2024-12-25',
+            '2025-01-01', '2025-01-09', '2025-01-20', '2025-02-17', '2025-04-18', '2025-05-26',
+            '2025-06-19', '2025-07-04', '2025-09-01', '2025-11-27', '2025-12-25',
+            '2026-01-01', '2026-01-19', '2026-02-16', '2026-04-03', '2026-05-25', '2026-06-19',
+            '2026-07-03', '2026-09-07', '2026-11-26', '2026-12-25',
+            '2027-01-01', '2027-01-18', '2027-02-15', '2027-03-26', '2027-05-31', '2027-06-18',
+            '2027-07-05', '2027-09-06', '2027-11-25', '2027-12-24',
+        ],
+    },
+    'XLON': {
+        'tz': 'Europe/London',
+        'open': '08:00',
+        'close': '16:30',
+        'weekmask': 'Mon Tue Wed Thu Fri',
+        'holidays': [
+            '2024-01-01', '2024-03-29', '2024-04-01', '2024-05-06', '2024-05-27', '2024-08-26',
+            '2024-12-25', '2024-12-26',
+            '2025-01-01', '2025-04-18', '2025-04-21', '2025-05-05', '2025-05-26', '2025-08-25',
+            '2025-12-25', '2025-12-26',
+            '2026-01-01', '2026-04-03', '2026-04-06', '2026-05-04', '2026-05-25', '2026-08-31',
+            '2026-12-25', '2026-12-28',
+            '2027-01-01', '2027-03-26', '2027-03-29', '2027-05-03', '2027-05-31', '2027-08-30',
+            '2027-12-27', '2027-12-28',
+        ],
+    },
+    'XETR': {
+        'tz': 'Europe/Berlin',
+        'open': '09:00',
+        'close': '17:30',
+        'weekmask': 'Mon Tue Wed Thu Fri',
+        'holidays': [
+            '2024-01-01', '2024-03-29', '2024-04-01', '2024-05-01', '2024-12-24', '2024-12-25',
+            '2024-12-26', '2024-12-31',
+            '2025-01-01', '2025-04-18', '2025-04-21', '2025-05-01', '2025-12-24', '2025-12-25',
+            '2025-12-26', '2025-12-31',
+            '2026-01-01', '2026-04-03', '2026-04-06', '2026-05-01', '2026-12-24', '2026-12-25',
+            '2026-12-31',
+            '2027-01-01', '2027-03-26', '2027-03-29', '2027-12-24', '2027-12-31',
+        ],
+    },
+}
+
+TICKER_SUFFIX_EXCHANGES = {
+    '.L': 'XLON',
+    '.DE': 'XETR',
+}
+
+DEFAULT_EXCHANGE = 'XNYS'
+
+
+def exchange_for(ticker):
+    for suffix, exchange in TICKER_SUFFIX_EXCHANGES.items():
+        if ticker.upper().endswith(suffix):
+            return exchange
+    return DEFAULT_EXCHANGE
+
+
+def primary_exchange(tickers):
+    exchanges = pd.Series([exchange_for(ticker) for ticker in tickers])
+    return exchanges.mode().iloc[0] if not exchanges.empty else DEFAULT_EXCHANGE
+
+
+def trading_day(exchange):
+    calendar = EXCHANGE_CALENDARS[exchange]
+    return pd.offsets.CustomBusinessDay(weekmask=calendar['weekmask'], holidays=calendar['holidays'])
+
+
+def bar_step(timeframe):
+    # Intraday yfinance intervals ('30m', '1h', '90m', ...) as a Timedelta, None for daily and above.
+    match = re.fullmatch(r'(\d+)([mh])', timeframe)
+    if match is None:
+        return None
+    return pd.Timedelta(int(match.group(1)), unit='min' if match.group(2) == 'm' else 'h')
+
+
+def adjust_prices(close, splits=None):
+    # Back-adjust for splits whose jump is still visible in the prices; splits the
+    # data provider already adjusted for leave no jump and are skipped.
+    if splits is None:
+        return close
+    ratios = splits.reindex(close.index).fillna(0.0)
+    ratios = ratios.where(ratios > 0, 1.0)
+    jump = close / close.shift(1)
+    unadjusted = (np.log(jump * ratios).abs() < np.log(jump).abs()) & (ratios != 1.0)
+    factors = ratios.where(unadjusted, 1.0)
+    after = factors[::-1].cumprod()[::-1].shift(-1, fill_value=1.0)
+    return close / after
+
+
+def has_prices(histories):
+    return bool(histories) and all('Close' in hist and not hist.empty for hist in histories.values())
+
+
+def _align(histories):
+    if not has_prices(histories):
+        raise ValueError("No price data available for every ticker")
+    closes, dividends = {}, {}
+    for ticker, hist in histories.items():
+        closes[ticker] = adjust_prices(hist['Close'], hist.get('Stock Splits'))
+        dividends[ticker] = hist['Dividends'] if 'Dividends' in hist else pd.Series(0.0, index=hist.index)
+
+    # Tickers on different calendars are carried forward at their last price, and
+    # bars before every ticker has started trading are dropped.
+    prices = pd.concat(closes, axis=1).sort_index().ffill().dropna()
+    dividends = pd.concat(dividends, axis=1).reindex(prices.index).fillna(0.0)
+    return prices, dividends
+
+
+def portfolio_value(histories, config):
+    if not has_prices(histories):
+        return None
+    prices, _ = _align(histories)
+    shares = pd.Series(config).reindex(prices.columns)
+    return (prices * shares).sum(axis=1)
+
+
+def log_returns(histories, config, timeframe, gaps='drop'):
+    prices, dividends = _align(histories)
+    shares = pd.Series(config).reindex(prices.columns)
+
+    # Total return of the fixed-share portfolio: dividends paid on a bar count as return.
+    previous = (prices.shift(1) * shares).sum(axis=1)
+    current = ((prices + dividends) * shares).sum(axis=1)
+    returns = np.log(current / previous).iloc[1:]
+
+    if gaps not in ('drop', 'keep', 'only'):
+        raise ValueError(f"Unknown gaps mode '{gaps}', expected 'drop', 'keep' or 'only'")
+    if gaps != 'keep':
+        # On intraday timeframes the first bar of a session carries the overnight/weekend
+        # gap; 'drop' keeps the intraday bars and 'only' keeps the gap bars.
+        is_gap = np.zeros(len(returns), dtype=bool)
+        if bar_step(timeframe) is not None:
+            sessions = _local(prices.index, primary_exchange(config)).normalize()
+            is_gap = np.asarray(sessions[1:] != sessions[:-1])
+        returns = returns[is_gap if gaps == 'only' else ~is_gap]
+
+    return returns.replace([np.inf, -np.inf], np.nan).dropna()
+
+
+def _local(index, exchange):
+    if index.tz is None:
+        return index
+    return index.tz_convert(EXCHANGE_CALENDARS[exchange]['tz'])
+
+
+def session_crossings(last_date, dates, exchange=DEFAULT_EXCHANGE):
+    # True for each future bar that opens a new session, i.e. whose step spans an overnight gap.
+    local = _local(pd.DatetimeIndex([last_date]).append(pd.DatetimeIndex(dates)), exchange).normalize()
+    return np.asarray(local[1:] != local[:-1])
+
+
+def future_dates(last_date, timeframe, periods, exchange=DEFAULT_EXCHANGE):
+    if periods <= 0:
+        return pd.DatetimeIndex([])
+    last_date = pd.Timestamp(last_date)
+    calendar = EXCHANGE_CALENDARS[exchange]
+    day = trading_day(exchange)
+    step = bar_step(timeframe)
+
+    if step is None and timeframe == '1d':
+        return pd.date_range(start=last_date + day, periods=periods, freq=day)
+    if step is None:
+        offset = {'5d': 5 * day, '1wk': pd.offsets.Week(), '1mo': pd.offsets.MonthBegin(),
+                  '3mo': pd.offsets.QuarterBegin()}.get(timeframe, day)
+        return pd.DatetimeIndex([last_date + (i + 1) * offset for i in range(periods)])
+
+    local_last = last_date.tz_convert(calendar['tz']).tz_localize(None) if last_date.tz is not None else last_date
+    session_open = pd.Timedelta(calendar['open'] + ':00')
+    session_close = pd.Timedelta(calendar['close'] + ':00')
+    offsets = pd.TimedeltaIndex(session_open + step * np.arange(int(np.ceil((session_close - session_open) / step))))
+
+    # Enough trading days to cover the horizon, then every bar of every day at once.
+    n_days = int(np.ceil(periods / len(offsets))) + 1
+    days = pd.date_range(start=local_last.normalize(), periods=n_days + 1, freq=day)
+    grid = pd.DatetimeIndex((days.values[:, None] + offsets.values[None, :]).ravel())
+    grid = grid[grid > local_last][:periods]
+    if last_date.tz is not None:
+        grid = grid.tz_localize(calendar['tz']).tz_convert(last_date.tz)
+    return grid
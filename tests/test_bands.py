@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.stats as stats
+from src.bands import BandEngine, cornish_fisher
+
+PROBABILITIES = np.array([0.005, 0.025, 0.05, 0.10, 0.25, 0.995, 0.975, 0.95, 0.90, 0.75])
+
+
+class _FakePortfolio:
+    # Serves a fixed return series; conditional variances of 1 make the returns their own residuals.
+    def __init__(self, log_returns):
+        self.log_returns = pd.Series(log_returns)
+        self.histories = object()
+
+    def get_histories(self, timeframe, period):
+        return self.histories
+
+    def get_returns(self, timeframe, period):
+        return self.log_returns
+
+
+class _UnitModel:
+    def __init__(self, portfolio):
+        self.portfolio = portfolio
+
+    def get_conditional_variances(self, timeframe, period):
+        return pd.Series(1.0, index=self.portfolio.log_returns.index)
+
+
+def _engine(residuals, **kwargs):
+    portfolio = _FakePortfolio(residuals)
+    return BandEngine(portfolio, **kwargs), _UnitModel(portfolio)
+
+
+def _quantiles(engine, model, distribution, variances):
+    return engine.quantiles(distribution, model, '1h', '1y', variances, PROBABILITIES)
+
+
+def _assert_nested(q):
+    order = np.argsort(PROBABILITIES)
+    assert np.all(np.diff(q[order], axis=0) >= 0)
+
+
+def test_normal_matches_sqrt_of_cumulative_variance():
+    engine, model = _engine(np.random.default_rng(0).normal(size=500))
+    variances = np.array([1.0, 2.0, 0.5, 4.0])
+    q = _quantiles(engine, model, 'normal', variances)
+    expected = stats.norm.ppf(PROBABILITIES)[:, None] * np.sqrt(np.cumsum(variances))[None, :]
+    np.testing.assert_allclose(q, expected)
+
+
+def test_student_t_one_step_uses_fitted_distribution():
+    residuals = np.random.default_rng(1).standard_t(3, 5000)
+    engine, model = _engine(residuals)
+    q = _quantiles(engine, model, 'student-t', np.array([4.0]))
+    dof, loc, scale = stats.t.fit(residuals - residuals.mean())
+    np.testing.assert_allclose(q[:, 0], 2.0 * stats.t.ppf(PROBABILITIES, dof, loc, scale))
+
+
+def test_student_t_converges_to_normal_over_long_horizons():
+    residuals = np.random.default_rng(3).standard_t(6, 20000)
+    engine, model = _engine(residuals)
+    horizon = 400
+    q = _quantiles(engine, model, 'student-t', np.ones(horizon))
+    dof, loc, scale = stats.t.fit(residuals - residuals.mean())
+    sd = scale * np.sqrt(dof / (dof - 2))
+    centered = (q[:, -1] - loc * horizon) / (sd * np.sqrt(horizon))
+    np.testing.assert_allclose(centered, stats.norm.ppf(PROBABILITIES), atol=0.05)
+
+
+def test_cornish_fisher_stays_monotone_at_high_kurtosis():
+    probabilities = np.sort(PROBABILITIES)
+    z = cornish_fisher(probabilities, np.array([0.0, -1.5]), np.array([20.0, 30.0]))
+    assert np.all(np.diff(z, axis=0) > 0)
+    # Without kurtosis or skew the expansion is the normal quantile.
+    np.testing.assert_allclose(cornish_fisher(probabilities, np.zeros(1), np.zeros(1))[:, 0],
+                               stats.norm.ppf(probabilities))
+
+
+def test_cornish_fisher_bands_nest_for_heavy_tailed_residuals():
+    residuals = np.random.default_rng(4).standard_t(2.2, 5000)
+    engine, model = _engine(residuals)
+    q = _quantiles(engine, model, 'cornish-fisher', np.ones(50))
+    _assert_nested(q)
+    assert np.all(q[5:] > q[:5])
+
+
+def test_cornish_fisher_aggregates_towards_normal():
+    residuals = np.random.default_rng(5).standard_t(8, 20000)
+    engine, model = _engine(residuals)
+    q = _quantiles(engine, model, 'cornish-fisher', np.ones(1000))
+    np.testing.assert_allclose(q[:, -1] / np.sqrt(1000), stats.norm.ppf(PROBABILITIES), atol=0.05)
+
+
+def test_fhs_matches_normal_for_normal_residuals_and_nests():
+    engine, model = _engine(np.random.default_rng(6).normal(size=20000), max_block=10000 * 3)
+    variances = np.full(20, 0.25)
+    q = _quantiles(engine, model, 'fhs', variances)
+    _assert_nested(q)
+    expected = stats.norm.ppf(PROBABILITIES) * np.sqrt(0.25 * 20)
+    np.testing.assert_allclose(q[:, -1], expected, rtol=0.08, atol=0.05)
+
+
+def test_fhs_is_deterministic():
+    residuals = np.random.default_rng(7).normal(size=1000)
+    first = _quantiles(*_engine(residuals), 'fhs', np.ones(5))
+    second = _quantiles(*_engine(residuals), 'fhs', np.ones(5))
+    np.testing.assert_array_equal(first, second)
+
+
+def test_unknown_distribution_is_rejected():
+    engine, model = _engine(np.zeros(10))
+    with pytest.raises(ValueError):
+        _quantiles(engine, model, 'cauchy', np.ones(3))
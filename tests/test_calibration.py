@@ -0,0 +1,104 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from src.calibration import ma_forecasts, ewma_forecasts, sweep, calibrate
+
+
+def _returns(n=400, seed=1):
+    return np.random.default_rng(seed).standard_t(5, n) * 0.01
+
+
+def test_ma_forecasts_match_rolling_mean():
+    squared = np.square(_returns())
+    windows = [5, 17, 60]
+    start = 60
+    forecasts = ma_forecasts(squared, windows, start)
+    for row, window in zip(forecasts, windows):
+        expected = [squared[t - window:t].mean() for t in range(start, len(squared))]
+        np.testing.assert_allclose(row, expected)
+
+
+def test_ewma_forecasts_match_seeded_recursion():
+    squared = np.square(_returns())
+    lambdas = [0.8, 0.94, 0.99]
+    start, n_lags, seed = 80, 50, 2e-4
+    forecasts = ewma_forecasts(squared, lambdas, start, n_lags, seed)
+    for row, l in zip(forecasts, lambdas):
+        expected = []
+        for t in range(start, len(squared)):
+            sigma2 = seed
+            for k in range(t - n_lags, t):
+                sigma2 = l * sigma2 + (1 - l) * squared[k]
+            expected.append(sigma2)
+        np.testing.assert_allclose(row, expected)
+
+
+def test_sweep_scores_match_naive_qlike():
+    r = _returns()
+    windows, lambdas = np.array([10, 40]), np.array([0.9, 0.97])
+    result = sweep(r, windows=windows, lambdas=lambdas, tol=1e-3)
+    squared = np.square(r)
+    n_lags = min(int(np.ceil(np.log(1e-3) / np.log(0.97))), len(r) // 2)
+    start = max(40, n_lags)
+    seed = r[:start].var(ddof=1)
+
+    def qlike(forecasts):
+        return np.mean(np.log(forecasts) + squared[start:] / forecasts)
+
+    for window, score in zip(windows, result["ma"]["scores"]):
+        forecasts = np.array([squared[t - window:t].mean() for t in range(start, len(r))])
+        assert score == pytest.approx(qlike(forecasts))
+    for l, score in zip(lambdas, result["ewma"]["scores"]):
+        forecasts = []
+        for t in range(start, len(r)):
+            sigma2 = seed
+            for k in range(t - n_lags, t):
+                sigma2 = l * sigma2 + (1 - l) * squared[k]
+            forecasts.append(sigma2)
+        assert score == pytest.approx(qlike(np.array(forecasts)))
+
+
+def test_sweep_seed_ignores_evaluation_sample():
+    # Shocking the last return only changes its realized value: with a seed taken
+    # from before the evaluation sample, no forecast moves.
+    r = _returns()
+    l, tol = 0.97, 1e-3
+    kwargs = dict(windows=[10], lambdas=[l], tol=tol)
+    shocked = r.copy()
+    shocked[-1] *= 50
+
+    squared = np.square(r)
+    n_lags = min(int(np.ceil(np.log(tol) / np.log(l))), len(r) // 2)
+    start = max(10, n_lags)
+    sigma2 = r[:start].var(ddof=1)
+    for k in range(len(r) - 1 - n_lags, len(r) - 1):
+        sigma2 = l * sigma2 + (1 - l) * squared[k]
+
+    delta = sweep(shocked, **kwargs)["ewma"]["scores"][0] - sweep(r, **kwargs)["ewma"]["scores"][0]
+    expected = (shocked[-1] ** 2 - r[-1] ** 2) / sigma2 / (len(r) - start)
+    assert delta == pytest.approx(expected)
+
+
+def test_sweep_drops_windows_longer_than_half_the_sample():
+    result = sweep(_returns(100), windows=[10, 50, 51, 200], lambdas=[0.9])
+    assert list(result["ma"]["windows"]) == [10, 50]
+
+
+def test_sweep_rejects_too_few_returns():
+    with pytest.raises(ValueError):
+        sweep(_returns(10), windows=[20], lambdas=[0.9])
+
+
+class _FakePortfolio:
+    def get_returns(self, timeframe, period):
+        return pd.Series(_returns(400 if timeframe == '1h' else 200, seed=len(timeframe) + len(period)))
+
+
+def test_calibrate_writes_params_per_timeframe(tmp_path):
+    path = tmp_path / 'calibrated_params.json'
+    calibrate(_FakePortfolio(), ['1h', '1d'], '1y', path=path, windows=np.arange(5, 150), lambdas=[0.9, 0.95])
+    params = json.loads(path.read_text())
+    assert set(params) == {'1h', '1d'}
+    assert params['1d']['ma_params']['window'] <= 100
+    assert set(params['1h']) == {'ma_params', 'ewma_params'}
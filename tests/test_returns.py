@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src import returns
+
+TZ = 'America/New_York'
+
+
+def _history(close, index, dividends=None, splits=None):
+    n = len(close)
+    return pd.DataFrame({
+        'Close': np.asarray(close, dtype=float),
+        'Dividends': np.zeros(n) if dividends is None else np.asarray(dividends, dtype=float),
+        'Stock Splits': np.zeros(n) if splits is None else np.asarray(splits, dtype=float),
+    }, index=index)
+
+
+def _hourly(days):
+    bars = [pd.Timestamp(f'{day} {hour}:30', tz=TZ) for day in days for hour in range(9, 16)]
+    return pd.DatetimeIndex(bars)
+
+
+def test_adjust_prices_back_adjusts_visible_split():
+    index = pd.bdate_range('2025-01-06', periods=4, tz=TZ)
+    close = pd.Series([100.0, 102.0, 51.0, 52.0], index=index)
+    splits = pd.Series([0.0, 0.0, 2.0, 0.0], index=index)
+    np.testing.assert_allclose(returns.adjust_prices(close, splits), [50.0, 51.0, 51.0, 52.0])
+
+
+def test_adjust_prices_skips_split_already_in_prices():
+    index = pd.bdate_range('2025-01-06', periods=4, tz=TZ)
+    close = pd.Series([50.0, 51.0, 51.0, 52.0], index=index)
+    splits = pd.Series([0.0, 0.0, 2.0, 0.0], index=index)
+    np.testing.assert_allclose(returns.adjust_prices(close, splits), close)
+
+
+def test_log_returns_count_dividends_and_weight_by_shares():
+    index = pd.bdate_range('2025-01-06', periods=3, tz=TZ)
+    histories = {
+        'A': _history([100.0, 100.0, 110.0], index, dividends=[0.0, 1.0, 0.0]),
+        'B': _history([10.0, 20.0, 20.0], index),
+    }
+    config = {'A': 1, 'B': 5}
+    result = returns.log_returns(histories, config, '1d')
+    expected = [np.log((101.0 + 100.0) / (100.0 + 50.0)), np.log((110.0 + 100.0) / (100.0 + 100.0))]
+    np.testing.assert_allclose(result.to_numpy(), expected)
+
+
+def test_session_gaps_split_intraday_returns():
+    index = _hourly(['2025-07-02', '2025-07-03'])
+    close = 100 + np.arange(len(index), dtype=float)
+    histories = {'A': _history(close, index)}
+    config = {'A': 1}
+
+    kept = returns.log_returns(histories, config, '1h', gaps='keep')
+    dropped = returns.log_returns(histories, config, '1h', gaps='drop')
+    only = returns.log_returns(histories, config, '1h', gaps='only')
+
+    assert len(kept) == len(index) - 1
+    assert list(only.index) == [pd.Timestamp('2025-07-03 09:30', tz=TZ)]
+    assert len(dropped) == len(kept) - 1
+    assert dropped.index.union(only.index).equals(kept.index)
+
+
+def test_daily_bars_have_no_session_gaps():
+    index = pd.bdate_range('2025-01-06', periods=5, tz=TZ)
+    histories = {'A': _history([1.0, 2.0, 3.0, 4.0, 5.0], index)}
+    assert len(returns.log_returns(histories, {'A': 1}, '1d', gaps='drop')) == 4
+    assert returns.log_returns(histories, {'A': 1}, '1d', gaps='only').empty
+
+
+def test_unknown_gaps_mode_is_rejected():
+    index = pd.bdate_range('2025-01-06', periods=3, tz=TZ)
+    with pytest.raises(ValueError):
+        returns.log_returns({'A': _history([1.0, 2.0, 3.0], index)}, {'A': 1}, '1d', gaps='skip')
+
+
+def test_daily_future_dates_skip_weekends_and_holidays():
+    dates = returns.future_dates(pd.Timestamp('2025-07-02', tz=TZ), '1d', 3)
+    assert [date.strftime('%Y-%m-%d') for date in dates] == ['2025-07-03', '2025-07-07', '2025-07-08']
+
+
+def test_intraday_future_dates_follow_sessions():
+    dates = returns.future_dates(pd.Timestamp('2025-07-03 14:30', tz=TZ), '1h', 3)
+    assert [date.strftime('%Y-%m-%d %H:%M') for date in dates] == [
+        '2025-07-03 15:30', '2025-07-07 09:30', '2025-07-07 10:30']
+    assert str(dates.tz) == TZ
+
+
+def test_session_crossings_mark_new_sessions():
+    last = pd.Timestamp('2025-07-03 14:30', tz=TZ)
+    dates = returns.future_dates(last, '1h', 3)
+    assert list(returns.session_crossings(last, dates)) == [False, True, False]
+
+
+def test_exchange_lookup_by_suffix():
+    assert returns.exchange_for('VOD.L') == 'XLON'
+    assert returns.exchange_for('SAP.DE') == 'XETR'
+    assert returns.exchange_for('AAPL') == 'XNYS'
+    assert returns.primary_exchange(['AAPL', 'MSFT', 'VOD.L']) == 'XNYS'